@@ -49,12 +49,13 @@ module "lambda_function" {
                 "s3:PutObjectAcl",
                 "s3:GetObject",
                 "s3:GetObjectAcl",
-                "s3:DeleteObject"
+                "s3:DeleteObject",
+                "s3:ListBucket"
             ],
             "Effect": "Allow",
             "Resource": [
                 "arn:aws:s3:::s3-bucket-to-sftp-server-files/*",
-                "arn:aws:s3:::s3-bucket-to-sftp-server-files/"
+                "arn:aws:s3:::s3-bucket-to-sftp-server-files"
             ]
         }
     ]
@@ -19,20 +19,51 @@ Optional env vars
     SSH_FILENAME - used as a mask for the remote filename. Supports three
         string replacement vars - {bucket}, {key}, {current_date}. Bucket
         and key refer to the uploaded S3 file. Current date is in ISO format.
+    MAX_CONCURRENCY - number of S3 files transferred in parallel, defaults
+        to 8. Each worker uses its own SFTP channel over a shared connection.
+    S3_DOWNLOAD_CONCURRENCY - number of concurrent byte-range GETs used to
+        download each S3 file, defaults to 8.
+    SKIP_EMPTY_ARCHIVE - if '1', 'true' or 'yes' (case-insensitive),
+        successful transfers are not marked with an empty archive file; only
+        failed transfers ('.x') are archived. Any other value is ignored.
 
 """
+import atexit
+import collections
+import concurrent.futures
 import datetime
 import io
 import logging
 import os
+import string
+import threading
 
 import boto3
+import boto3.s3.transfer
+import botocore.config
 import botocore.exceptions
 import paramiko
 
 logger = logging.getLogger()
 logger.setLevel(os.getenv('LOGGING_LEVEL', 'DEBUG'))
 
+
+class PrefixAdapter(logging.LoggerAdapter):
+    """
+    Prefix all logging statements - otherwise impossible to filter out in
+    Cloudwatch.
+
+    The prefix is only added (and %-style args only formatted) if the record
+    is actually going to be logged.
+
+    """
+
+    def process(self, msg, kwargs):
+        return 'S3-SFTP: ' + msg, kwargs
+
+
+log = PrefixAdapter(logger, {})
+
 # read in shared properties on module load - will fail hard if any are missing
 SSH_HOST = os.environ['SSH_HOST']
 SSH_USERNAME = os.environ['SSH_USERNAME']
@@ -46,6 +77,57 @@ SSH_PORT = int(os.getenv('SSH_PORT', 22))
 SSH_DIR = os.getenv('SSH_DIR')
 # filename mask used for the remote file
 SSH_FILENAME = os.getenv('SSH_FILENAME', 'data_{current_date}')
+# number of files transferred in parallel
+MAX_CONCURRENCY = int(os.getenv('MAX_CONCURRENCY', 8))
+# number of threads issuing the archive PUTs and batched deletes
+S3_EXECUTOR_WORKERS = 4
+# number of concurrent range GETs used to download a single file
+S3_DOWNLOAD_CONCURRENCY = int(os.getenv('S3_DOWNLOAD_CONCURRENCY', 8))
+# don't write the empty archive marker for successful transfers
+SKIP_EMPTY_ARCHIVE = os.getenv('SKIP_EMPTY_ARCHIVE', '').lower() in ('1', 'true', 'yes')
+
+# the boto3 client is created once per container and reused across warm
+# invocations - building it is expensive (model parsing, credentials). The
+# low-level client is used throughout, rather than the resource layer.
+# The connection pool is sized so that every concurrent range GET (across all
+# worker threads), plus the archive / delete threads, can hold on to its own
+# warm HTTPS connection.
+S3_CONFIG = botocore.config.Config(
+    max_pool_connections=MAX_CONCURRENCY * S3_DOWNLOAD_CONCURRENCY + S3_EXECUTOR_WORKERS,
+    retries={'mode': 'adaptive', 'max_attempts': 5},
+    connect_timeout=3,
+    read_timeout=60
+)
+S3_CLIENT = boto3.client('s3', config=S3_CONFIG)
+# files over the threshold are downloaded as concurrent byte-range GETs
+S3_TRANSFER_CONFIG = boto3.s3.transfer.TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=S3_DOWNLOAD_CONCURRENCY,
+    use_threads=True
+)
+# files under the threshold are fetched with a single GET, so there is no
+# point spinning up the transfer manager's thread pool for them
+S3_SMALL_TRANSFER_CONFIG = boto3.s3.transfer.TransferConfig(
+    multipart_threshold=S3_TRANSFER_CONFIG.multipart_threshold,
+    use_threads=False
+)
+
+# the SFTP connection is likewise kept open between warm invocations, so that
+# we only pay for the SSH handshake when the container is cold (or the server
+# has dropped the connection).
+# paramiko SFTPClient is not thread-safe, so each worker thread opens its own
+# SFTP channel over the shared transport.
+_SFTP_STATE = {'transport': None}
+_SFTP_LOCK = threading.Lock()
+_SFTP_LOCAL = threading.local()
+# multi-record events are transferred in parallel, one remote file per worker
+EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_CONCURRENCY)
+# archive PUTs and batched deletes get their own (small) pool, so that they
+# aren't queued up behind the outstanding transfers
+S3_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=S3_EXECUTOR_WORKERS)
+# decoded private key - fetched from S3 once, then kept in memory
+_CACHED_PKEY = None
 
 
 def on_trigger_event(event, context):
@@ -74,74 +156,272 @@ def on_trigger_event(event, context):
         context: a LambdaContext object - unused.
 
     """
-    if SSH_PRIVATE_KEY:
-        key_obj = get_private_key(*SSH_PRIVATE_KEY.split(':'))
-    else:
-        key_obj = None
+    log.info("received trigger event")
+
+    # connect up front so that we fail hard before touching any S3 files
+    get_transport(pkey=PKEY)
+    current_date = datetime.date.today().isoformat()
+
+    # files that map to the same remote filename (e.g. with the default
+    # 'data_{current_date}' mask) can't be written concurrently, so they go to
+    # the same task and are transferred one after another, in event order.
+    groups = collections.defaultdict(list)
+    for bucket, key, size in s3_files(event):
+        groups[sftp_filename(bucket, key, current_date)].append((bucket, key, size))
+    futures = {
+        EXECUTOR.submit(process_files, filename, files, PKEY): files
+        for filename, files in groups.items()
+    }
+    # archive markers are written as soon as each task's transfers are done,
+    # overlapping the remaining transfers. A file is only deleted once its
+    # archive marker has been written - the deletes are then batched up into
+    # one request per bucket.
+    archives = {}
+    deletes = collections.defaultdict(list)
+    failed = []
+    for future in concurrent.futures.as_completed(futures):
+        for (bucket, key, _), result in zip(futures[future], future.result()):
+            if isinstance(result, Exception):
+                failed.append(key)
+                continue
+            if result is None:
+                # already transferred and deleted by an earlier attempt
+                continue
+            filename, contents = result
+            log.info("Archiving S3 file '%s'.", key)
+            archive_future = S3_EXECUTOR.submit(
+                archive_file,
+                bucket=bucket,
+                filename=filename,
+                contents=contents
+            )
+            archives[archive_future] = (bucket, key)
+
+    # archive_file only handles BotoCoreError - anything else (e.g. a
+    # ClientError) is raised here, and fails the invocation.
+    for future in concurrent.futures.as_completed(archives):
+        bucket, key = archives[future]
+        try:
+            archived = future.result()
+        except Exception:
+            log.exception("Error archiving S3 file '%s'.", key)
+            archived = False
+        if archived:
+            deletes[bucket].append(key)
+        else:
+            failed.append(key)
+
+    batches = {}
+    for bucket, keys in deletes.items():
+        log.info("Deleting %s S3 file(s) from '%s'.", len(keys), bucket)
+        batches[S3_EXECUTOR.submit(delete_files, bucket, keys)] = keys
+    for future in concurrent.futures.as_completed(batches):
+        try:
+            failed.extend(future.result())
+        except Exception:
+            log.exception("Error deleting %s from S3.", batches[future])
+            failed.extend(batches[future])
+
+    # fail the invocation so that Lambda retries it (or sends it to the DLQ).
+    # The files that failed are still in S3; the rest have been deleted, and
+    # will be skipped by `process_file` when the event is retried.
+    if failed:
+        raise RuntimeError(f"Failed to process S3 file(s): {failed}")
+
+
+def process_files(filename, files, pkey):
+    """
+    Transfer S3 files that share the same remote filename, one at a time.
 
-    # prefix all logging statements - otherwise impossible to filter out in
-    # Cloudwatch
-    logger.info(f"S3-SFTP: received trigger event")
+    This is run on a worker thread, one remote filename per task. Files are
+    transferred in event order, so the last one wins (as it would if the
+    event were processed serially).
 
-    sftp_client, transport = connect_to_sftp(
-        hostname=SSH_HOST,
-        port=SSH_PORT,
-        username=SSH_USERNAME,
-        password=SSH_PASSWORD,
-        pkey=key_obj
-    )
-    if SSH_DIR:
-        sftp_client.chdir(SSH_DIR)
-        logger.debug(f"S3-SFTP: Switched into remote SFTP upload directory")
-
-    with transport:
-        for s3_file in s3_files(event):
-            filename = sftp_filename(SSH_FILENAME, s3_file)
-            bucket = s3_file.bucket_name
-            contents = ''
-            try:
-                logger.info(f"S3-SFTP: Transferring S3 file '{s3_file.key}'")
-                transfer_file(sftp_client, s3_file, filename)
-            except botocore.exceptions.BotoCoreError as ex:
-                logger.exception(f"S3-SFTP: Error transferring S3 file '{s3_file.key}'.")
-                contents = str(ex)
-                filename = filename + '.x'
-            logger.info(f"S3-SFTP: Archiving S3 file '{s3_file.key}'.")
-            archive_file(bucket=bucket, filename=filename, contents=contents)
-            logger.info(f"S3-SFTP: Deleting S3 file '{s3_file.key}'.")
-            delete_file(s3_file)
+    Args:
+        filename: string, the remote filename to use
+        files: list of (bucket, key, size) 3-tuples, as yielded by `s3_files`
+        pkey: paramiko.RSAKey, used if authenticating with a private key.
+
+    Returns a list containing, for each file, either the value returned by
+        `process_file`, or the exception raised while processing it.
+
+    """
+    results = []
+    for bucket, key, size in files:
+        try:
+            results.append(process_file(bucket, key, filename, pkey, size=size))
+        except Exception as ex:
+            log.exception("Error processing S3 file '%s'.", key)
+            results.append(ex)
+    return results
+
+
+def process_file(bucket, key, filename, pkey, size=None):
+    """
+    Transfer a single S3 file to the SFTP server.
+
+    Archiving and deleting the S3 file is left to the caller, so that it can
+    be batched. The S3 file is checked for before the remote file is opened -
+    if it has gone (i.e. it was transferred and deleted by an earlier attempt
+    at the same event) it is skipped, rather than truncating the remote file.
+
+    Args:
+        bucket: string, S3 bucket name
+        key: string, S3 object key
+        filename: string, the remote filename to use
+        pkey: paramiko.RSAKey, used if authenticating with a private key.
+        size: int, the size of the S3 file in bytes, if known
+
+    Returns a 2-tuple containing the name of the archive file, and any status
+        message to be written to it, or None if the S3 file no longer exists.
+
+    """
+    try:
+        response = S3_CLIENT.head_object(Bucket=bucket, Key=key)
+    except botocore.exceptions.ClientError as ex:
+        if ex.response['Error']['Code'] in ('404', 'NoSuchKey'):
+            log.warning("S3 file '%s' no longer exists, skipping", key)
+            return None
+        raise
+    if size is None:
+        size = response['ContentLength']
+
+    contents = b''
+    try:
+        log.info("Transferring S3 file '%s'", key)
+        try:
+            sftp_client = get_sftp(pkey=pkey)
+            transfer_file(sftp_client, bucket, key, filename, size=size)
+        except (paramiko.SSHException, EOFError):
+            # this thread's channel (or the whole connection) has gone stale -
+            # reopen the channel, reconnecting only if the transport is dead,
+            # and retry once
+            log.warning("SFTP channel failed, reopening")
+            sftp_client = get_sftp(pkey=pkey, reopen=True)
+            transfer_file(sftp_client, bucket, key, filename, size=size)
+    except botocore.exceptions.BotoCoreError as ex:
+        log.exception("Error transferring S3 file '%s'.", key)
+        contents = str(ex).encode('utf-8')
+        filename = filename + '.x'
+    return filename, contents
 
 
 def connect_to_sftp(hostname, port, username, password, pkey):
-    """Connect to SFTP server and return client object."""
+    """Connect to SFTP server and return transport object."""
     transport = paramiko.Transport((hostname, port))
     transport.connect(username=username, password=password, pkey=pkey)
-    client = paramiko.SFTPClient.from_transport(transport)
-    logger.debug(f"S3-SFTP: Connected to remote SFTP server")
-    return client, transport
+    log.debug("Connected to remote SFTP server")
+    return transport
+
+
+def get_transport(pkey=None):
+    """
+    Return a connected transport, reusing the cached one if still healthy.
+
+    The transport is cached at module level so that warm invocations of the
+    Lambda skip the SSH handshake. If the cached transport is no longer
+    active / authenticated a new connection is made. A transport that is
+    still active is never replaced, as other threads may have channels open
+    on it.
+
+    Args:
+        pkey: paramiko.RSAKey, used if authenticating with a private key.
+
+    """
+    with _SFTP_LOCK:
+        transport = _SFTP_STATE['transport']
+        if (
+            transport is not None
+            and transport.is_active()
+            and transport.is_authenticated()
+        ):
+            return transport
+
+        close_sftp()
+        transport = connect_to_sftp(
+            hostname=SSH_HOST,
+            port=SSH_PORT,
+            username=SSH_USERNAME,
+            password=SSH_PASSWORD,
+            pkey=pkey
+        )
+        _SFTP_STATE['transport'] = transport
+        return transport
+
+
+def get_sftp(pkey=None, reopen=False):
+    """
+    Return an SFTP client for the current thread.
+
+    Each thread gets its own SFTP channel, opened over the shared transport
+    (see `get_transport`). The channel is reused until the transport changes.
+
+    Args:
+        pkey: paramiko.RSAKey, used if authenticating with a private key.
+        reopen: bool, if True discard this thread's channel and open a new
+            one - the shared transport is only replaced if it is dead.
+
+    """
+    if reopen and getattr(_SFTP_LOCAL, 'client', None) is not None:
+        try:
+            _SFTP_LOCAL.client.close()
+        except Exception:
+            log.debug("Error closing stale SFTP channel")
+        _SFTP_LOCAL.client = _SFTP_LOCAL.transport = None
+
+    transport = get_transport(pkey=pkey)
+    if getattr(_SFTP_LOCAL, 'transport', None) is transport:
+        return _SFTP_LOCAL.client
+
+    sftp_client = paramiko.SFTPClient.from_transport(transport)
+    if SSH_DIR:
+        sftp_client.chdir(SSH_DIR)
+        log.debug("Switched into remote SFTP upload directory")
+    _SFTP_LOCAL.client = sftp_client
+    _SFTP_LOCAL.transport = transport
+    return sftp_client
+
+
+@atexit.register
+def close_sftp():
+    """Close the cached SFTP connection, if there is one."""
+    transport = _SFTP_STATE['transport']
+    _SFTP_STATE['transport'] = None
+    if transport is not None:
+        try:
+            transport.close()
+        except Exception:
+            log.debug("Error closing stale SFTP connection")
 
 
 def get_private_key(bucket, key):
     """
     Return an RSAKey object from a private key stored on S3.
 
-    It will fail hard if the key cannot be read, or is invalid.
+    It will fail hard if the key cannot be read, or is invalid. The key is
+    cached for the lifetime of the container, so S3 is only hit once.
 
     """
-    key_obj = boto3.resource('s3').Object(bucket, key)
-    key_str = key_obj.get()['Body'].read().decode('utf-8')
-    key = paramiko.RSAKey.from_private_key(io.StringIO(key_str))
-    logger.debug(f"S3-SFTP: Retrieved private key from S3")
-    return key
+    global _CACHED_PKEY
+    if _CACHED_PKEY:
+        return _CACHED_PKEY
+    response = S3_CLIENT.get_object(Bucket=bucket, Key=key)
+    # paramiko parses the key as text (it matches the '-----BEGIN' line as a
+    # str), so the bytes must be decoded - a BytesIO would fail to load.
+    key_str = response['Body'].read().decode('utf-8')
+    _CACHED_PKEY = paramiko.RSAKey.from_private_key(io.StringIO(key_str))
+    log.debug("Retrieved private key from S3")
+    return _CACHED_PKEY
 
 
 def s3_files(event):
     """
-    Iterate through event and yield boto3.Object for each S3 file created.
+    Iterate through event and yield (bucket, key, size) for each S3 file created.
 
     This function loops through all the records in the payload,
     checks that the event is a file creation, and if so, yields a
-    boto3.Object that represents the file.
+    3-tuple of the bucket name and object key that identify the file, and
+    its size in bytes (None if the record doesn't include it).
 
     NB Redshift will trigger an `ObjectCreated:CompleteMultipartUpload` event
     will UNLOADing the data; if you select to dump a manifest file as well,
@@ -155,82 +435,178 @@ def s3_files(event):
     for record in event['Records']:
         bucket = record['s3']['bucket']['name']
         key = record['s3']['object']['key']
+        size = record['s3']['object'].get('size')
         event_category, event_subcat = record['eventName'].split(':')
         if event_category == 'ObjectCreated':
-            logger.info(f"S3-SFTP: Received '{ event_subcat }' trigger on '{ key }'")
-            yield boto3.resource('s3').Object(bucket, key)
+            log.info("Received '%s' trigger on '%s'", event_subcat, key)
+            yield bucket, key, size
         else:
-            logger.warning(f"S3-SFTP: Ignoring invalid event: { record }")
+            log.warning("Ignoring invalid event: %s", record)
 
 
-def sftp_filename(file_mask, s3_file):
-    """Create destination SFTP filename."""
-    return file_mask.format(
-        bucket=s3_file.bucket_name,
-        key=s3_file.key.replace("_000", ""),
-        current_date=datetime.date.today().isoformat()
+def compile_filename_mask(file_mask):
+    """
+    Return a function that fills in the filename mask.
+
+    As the mask is fixed for the lifetime of the container, it is parsed once
+    and turned into the source of a function that only concatenates the
+    literal text and the placeholders actually used - e.g. the default
+    'data_{current_date}' becomes `return 'data_' + current_date`. Masks using
+    anything other than the three plain placeholders (attribute / index
+    lookups, nested format specs) fall back to str.format.
+
+    Args:
+        file_mask: string, the SSH_FILENAME mask
+
+    Returns a function taking `bucket`, `key` and `current_date` strings.
+
+    """
+    def format_mask(bucket, key, current_date):
+        return file_mask.format(bucket=bucket, key=key, current_date=current_date)
+
+    conversions = {None: '{}', 's': 'str({})', 'r': 'repr({})', 'a': 'ascii({})'}
+    parts = []
+    for literal, field, spec, conversion in string.Formatter().parse(file_mask):
+        if literal:
+            parts.append(repr(literal))
+        if field is None:
+            continue
+        if field not in ('bucket', 'key', 'current_date') or '{' in spec:
+            return format_mask
+        expr = conversions[conversion].format(field)
+        parts.append(f'format({expr}, {spec!r})' if spec else expr)
+
+    source = (
+        'def filename_fn(bucket, key, current_date):\n'
+        f'    return {" + ".join(parts) or repr("")}\n'
     )
+    namespace = {}
+    exec(source, namespace)
+    return namespace['filename_fn']
 
 
-def transfer_file(sftp_client, s3_file, filename):
+def sftp_filename(bucket, key, current_date):
+    """Create destination SFTP filename."""
+    return SFTP_FILENAME_FN(bucket, key.replace("_000", ""), current_date)
+
+
+def transfer_file(sftp_client, bucket, key, filename, size=None):
     """
     Transfer S3 file to SFTP server.
 
+    Files smaller than the multipart threshold are downloaded on the calling
+    thread, which avoids spinning up the boto3 transfer manager's threads.
+    Larger files (or files of unknown size) are downloaded as concurrent
+    byte-range GETs. Either way boto3 retries interrupted downloads.
+
     Args:
         sftp_client: paramiko.SFTPClient, connected to SFTP endpoint
-        s3_file: boto3.Object representing the S3 file
+        bucket: string, S3 bucket name
+        key: string, S3 object key
         filename: string, the remote filename to use
+        size: int, the size of the S3 file in bytes, if known
 
     Returns a 2-tuple containing the name of the remote file as transferred,
         and any status message to be written to the archive file.
 
     """
     with sftp_client.file(filename, 'w') as sftp_file:
-        s3_file.download_fileobj(Fileobj=sftp_file)
-    logger.info(f"S3-SFTP: Transferred '{ s3_file.key }' from S3 to SFTP as '{ filename }'")
-
-
-def delete_file(s3_file):
+        # don't block waiting for the server to ACK each write
+        sftp_file.set_pipelined(True)
+        # send larger WRITE requests than paramiko's 32 KB default
+        sftp_file.MAX_REQUEST_SIZE = 1 << 17
+        if size is not None and size < S3_TRANSFER_CONFIG.multipart_threshold:
+            config = S3_SMALL_TRANSFER_CONFIG
+        else:
+            config = S3_TRANSFER_CONFIG
+        # s3transfer funnels all writes through a single IO thread, seeking
+        # to each part's offset, so this is safe on an SFTPFile
+        S3_CLIENT.download_fileobj(
+            Bucket=bucket,
+            Key=key,
+            Fileobj=sftp_file,
+            Config=config
+        )
+    log.info("Transferred '%s' from S3 to SFTP as '%s'", key, filename)
+
+
+def delete_files(bucket, keys):
     """
-    Delete file from S3.
+    Delete files from S3.
 
-    This is only a one-liner, but it's pulled out into its own function
-    to make it easier to mock in tests, and to make the trigger
-    function easier to read.
+    The keys are deleted using the batch DeleteObjects API, which takes up
+    to 1000 keys per request.
 
     Args:
-        s3_file: boto3.Object representing the S3 file
-
-    """
-    try:
-        s3_file.delete()
-    except botocore.exceptions.BotoCoreError as ex:
-        logger.exception(f"S3-SFTP: Error deleting '{ s3_file.key }' from S3.")
-    else:
-        logger.info(f"S3-SFTP: Deleted '{ s3_file.key }' from S3")
+        bucket: string, S3 bucket name
+        keys: list of strings, the S3 keys to delete
 
+    Returns a list of the keys that could not be deleted. DeleteObjects
+        reports per-key failures (e.g. AccessDenied) in a successful
+        response, so these won't raise.
 
-def archive_file(*, bucket, filename, contents):
+    """
+    failed = []
+    for i in range(0, len(keys), 1000):
+        batch = keys[i:i + 1000]
+        try:
+            response = S3_CLIENT.delete_objects(
+                Bucket=bucket,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+        except botocore.exceptions.BotoCoreError:
+            log.exception("Error deleting %s from S3.", batch)
+            failed.extend(batch)
+            continue
+        errors = response.get('Errors', [])
+        for error in errors:
+            log.error("Error deleting '%s' from S3: %s", error['Key'], error['Message'])
+        batch_failed = {error['Key'] for error in errors}
+        for key in batch:
+            if key in batch_failed:
+                failed.append(key)
+            else:
+                log.info("Deleted '%s' from S3", key)
+    return failed
+
+
+def archive_file(*, bucket, filename, contents=b''):
     """
     Write to S3 an archive file.
 
     The archive does **not** contain the file that was sent, as we don't
     want the data hanging around on S3. Instead it's just an empty marker
     that represents the file. If the transfer errored, then the archive file
-    has a '.x' suffix, and will contain the error message.
+    has a '.x' suffix, and will contain the error message. The empty marker
+    is skipped altogether if SKIP_EMPTY_ARCHIVE is set.
 
     Args:
         bucket: string, S3 bucket name
         filename: string, the name of the archive file
-        contents: string, the contents of the archive file - blank unless there
+        contents: bytes, the contents of the archive file - blank unless there
             was an exception, in which case the exception message.
 
+    Returns True if the archive was written (or deliberately skipped), False
+        if writing it failed.
+
     """
     key = 'archive/{}'.format(filename)
+    if not contents and SKIP_EMPTY_ARCHIVE:
+        log.info("Skipped empty archive for '%s'.", filename)
+        return True
     try:
-        boto3.resource('s3').Object(bucket, key).put(Body=contents)
+        S3_CLIENT.put_object(Bucket=bucket, Key=key, Body=contents)
     except botocore.exceptions.BotoCoreError as ex:
-        logger.error("Error loading to s3: %s" % ex) 
-        logger.exception(f"S3-SFTP: Error archiving '{ filename }' as '{ key }'.")
-    else:
-        logger.info(f"S3-SFTP: Archived '{ filename }' as '{ key }'.")
+        log.error("Error loading to s3: %s", ex)
+        log.exception("Error archiving '%s' as '%s'.", filename, key)
+        return False
+    log.info("Archived '%s' as '%s'.", filename, key)
+    return True
+
+
+# the filename mask is fixed for the lifetime of the container, so a function
+# specialised to it is generated once at import
+SFTP_FILENAME_FN = compile_filename_mask(SSH_FILENAME)
+# load the private key during init rather than on the first invocation, so
+# that it is done by provisioned concurrency ahead of any events.
+PKEY = get_private_key(*SSH_PRIVATE_KEY.split(':')) if SSH_PRIVATE_KEY else None
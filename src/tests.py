@@ -0,0 +1,233 @@
+"""
+Tests for the s3_to_sftp Lambda function.
+
+S3 and SFTP are both mocked out - `S3_CLIENT` is replaced with a mock whose
+`download_fileobj` writes the (fake) file contents into the SFTP file, and
+the SFTP client is a simple in-memory fake.
+
+Run with `python -m pytest tests.py` (or `python -m unittest tests`) from
+the src directory.
+
+"""
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+# the module reads its config on import - will fail hard if any are missing
+os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+os.environ.setdefault('SSH_HOST', 'localhost')
+os.environ.setdefault('SSH_USERNAME', 'user')
+os.environ.setdefault('SSH_PASSWORD', 'password')
+
+import botocore.exceptions  # noqa: E402
+
+import s3_to_sftp  # noqa: E402
+
+TEST_RECORD = {
+    "eventVersion": "2.0",
+    "eventSource": "aws:s3",
+    "awsRegion": "eu-west-1",
+    "eventTime": "1970-01-01T00:00:00.000Z",
+    "eventName": "ObjectCreated:Put",
+    "s3": {
+        "s3SchemaVersion": "1.0",
+        "configurationId": "testConfigRule",
+        "bucket": {
+            "name": "bucket",
+            "arn": "arn:aws:s3:::bucket"
+        },
+        "object": {
+            "key": "key",
+            "size": 1024
+        }
+    }
+}
+
+# contents of the fake S3 files
+TEST_FILES = {
+    'a': b'A' * 64,
+    'b': b'B' * 64,
+}
+
+
+def event(*keys):
+    """Return a trigger event with an ObjectCreated record for each key."""
+    records = []
+    for key in keys:
+        record = dict(TEST_RECORD, s3=dict(TEST_RECORD['s3']))
+        record['s3']['object'] = {'key': key, 'size': len(TEST_FILES[key])}
+        records.append(record)
+    return {'Records': records}
+
+
+def client_error(code):
+    return botocore.exceptions.ClientError({'Error': {'Code': code, 'Message': code}}, 'Op')
+
+
+class FakeSFTPFile:
+    """In-memory stand-in for paramiko.SFTPFile."""
+
+    def __init__(self, remote, filename):
+        self.remote = remote
+        self.filename = filename
+        self.remote[filename] = b''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def set_pipelined(self, pipelined):
+        pass
+
+    def write(self, data):
+        self.remote[self.filename] += data
+
+
+class FakeSFTPClient:
+    """In-memory stand-in for paramiko.SFTPClient."""
+
+    def __init__(self):
+        self.remote = {}
+
+    def file(self, filename, mode):
+        return FakeSFTPFile(self.remote, filename)
+
+
+def fake_download(Bucket, Key, Fileobj, Config):
+    # write in small slow chunks, so that concurrent writes would interleave
+    data = TEST_FILES[Key]
+    for i in range(0, len(data), 8):
+        Fileobj.write(data[i:i + 8])
+        time.sleep(0.001)
+
+
+class OnTriggerEventTests(unittest.TestCase):
+
+    def setUp(self):
+        self.sftp_client = FakeSFTPClient()
+        self.s3_client = mock.Mock()
+        self.s3_client.head_object.side_effect = (
+            lambda Bucket, Key: {'ContentLength': len(TEST_FILES[Key])}
+        )
+        self.s3_client.download_fileobj.side_effect = fake_download
+        self.s3_client.delete_objects.return_value = {}
+        patches = [
+            mock.patch.object(s3_to_sftp, 'S3_CLIENT', self.s3_client),
+            mock.patch.object(s3_to_sftp, 'get_transport'),
+            mock.patch.object(s3_to_sftp, 'get_sftp', return_value=self.sftp_client),
+            mock.patch.object(
+                s3_to_sftp,
+                'SFTP_FILENAME_FN',
+                s3_to_sftp.compile_filename_mask('{key}')
+            ),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def archived(self):
+        return [c[1]['Key'] for c in self.s3_client.put_object.call_args_list]
+
+    def deleted(self):
+        return [
+            obj['Key']
+            for c in self.s3_client.delete_objects.call_args_list
+            for obj in c[1]['Delete']['Objects']
+        ]
+
+    def test_transfer_archive_delete(self):
+        s3_to_sftp.on_trigger_event(event('a', 'b'), None)
+        self.assertEqual(self.sftp_client.remote, TEST_FILES)
+        self.assertCountEqual(self.archived(), ['archive/a', 'archive/b'])
+        self.assertCountEqual(self.deleted(), ['a', 'b'])
+        # one batch delete for the bucket
+        self.assertEqual(self.s3_client.delete_objects.call_count, 1)
+
+    def test_same_filename_transferred_serially(self):
+        active = []
+        lock = threading.Lock()
+
+        def download(**kwargs):
+            with lock:
+                active.append(kwargs['Key'])
+                self.assertEqual(len(active), 1, "concurrent writes to one file")
+            try:
+                fake_download(**kwargs)
+            finally:
+                with lock:
+                    active.remove(kwargs['Key'])
+
+        self.s3_client.download_fileobj.side_effect = download
+        with mock.patch.object(
+            s3_to_sftp, 'SFTP_FILENAME_FN', s3_to_sftp.compile_filename_mask('data')
+        ):
+            s3_to_sftp.on_trigger_event(event('a', 'b'), None)
+        # the last file in the event wins, uncorrupted
+        self.assertEqual(self.sftp_client.remote, {'data': TEST_FILES['b']})
+        self.assertCountEqual(self.deleted(), ['a', 'b'])
+
+    def test_transfer_failure_raises(self):
+        def download(**kwargs):
+            if kwargs['Key'] == 'a':
+                raise client_error('AccessDenied')
+            fake_download(**kwargs)
+
+        self.s3_client.download_fileobj.side_effect = download
+        with self.assertRaisesRegex(RuntimeError, "'a'"):
+            s3_to_sftp.on_trigger_event(event('a', 'b'), None)
+        # the successful file is still cleared up
+        self.assertEqual(self.archived(), ['archive/b'])
+        self.assertEqual(self.deleted(), ['b'])
+
+    def test_archive_failure_means_no_delete(self):
+        def put_object(Bucket, Key, Body):
+            if Key == 'archive/a':
+                raise client_error('AccessDenied')
+
+        self.s3_client.put_object.side_effect = put_object
+        with self.assertRaisesRegex(RuntimeError, "'a'"):
+            s3_to_sftp.on_trigger_event(event('a', 'b'), None)
+        self.assertEqual(self.deleted(), ['b'])
+
+    def test_delete_failure_raises(self):
+        self.s3_client.delete_objects.return_value = {
+            'Errors': [{'Key': 'a', 'Code': 'AccessDenied', 'Message': 'Access Denied'}]
+        }
+        with self.assertRaisesRegex(RuntimeError, "'a'"):
+            s3_to_sftp.on_trigger_event(event('a', 'b'), None)
+
+    def test_missing_file_skipped(self):
+        def head_object(Bucket, Key):
+            if Key == 'a':
+                raise client_error('404')
+            return {'ContentLength': len(TEST_FILES[Key])}
+
+        self.s3_client.head_object.side_effect = head_object
+        # e.g. a retried event, where 'a' was already transferred and deleted
+        s3_to_sftp.on_trigger_event(event('a', 'b'), None)
+        self.assertEqual(self.sftp_client.remote, {'b': TEST_FILES['b']})
+        self.assertEqual(self.archived(), ['archive/b'])
+        self.assertEqual(self.deleted(), ['b'])
+
+
+class FilenameMaskTests(unittest.TestCase):
+
+    def test_matches_str_format(self):
+        for mask in [
+            'data_{current_date}',
+            '{bucket}/{key}_{current_date}.csv',
+            '100%_{key}',
+            '{{literal}}_{key!r}_{key:>4}',
+            'plain',
+        ]:
+            expected = mask.format(bucket='b', key='k', current_date='2020-01-01')
+            actual = s3_to_sftp.compile_filename_mask(mask)('b', 'k', '2020-01-01')
+            self.assertEqual(actual, expected, mask)
+
+
+if __name__ == '__main__':
+    unittest.main()